@@ -0,0 +1,523 @@
+#!/usr/bin/env python3
+"""
+Bulk Job Planner - Dry-run for Google Workspace + Discord
+Resolves a bulk job against cached state, then estimates requests,
+Directory quota, Discord rate-limit buckets and wall-clock time.
+Nothing is written: snapshot only reads, plan is fully offline.
+Benjamin Belaga - YOYAKU
+"""
+
+import os
+import sys
+import json
+import math
+import time
+import hashlib
+import statistics
+from datetime import datetime
+
+CACHE_DIR = os.path.expanduser('~/.cache/yoyaku')
+STATE_CACHE = os.path.join(CACHE_DIR, 'bulk-plan-state.json')
+LATENCY_LOG = os.path.join(CACHE_DIR, 'api-latency.jsonl')
+
+# Google Workspace (same credentials as ~/tools/google-workspace)
+SERVICE_ACCOUNT_FILE = os.path.expanduser('~/.credentials/yoyaku/api-keys/google-workspace-service-account.json')
+ADMIN_EMAIL = 'ben@yoyaku.fr'
+
+SCOPES = [
+    'https://www.googleapis.com/auth/admin.directory.group',
+    'https://www.googleapis.com/auth/admin.directory.group.member'
+]
+
+DISCORD_API_URL = "https://discord.com/api/v10"
+
+# Admin SDK Directory API: 1 unit per call, default quota per minute per user
+DIRECTORY_QUOTA_COST = {
+    'directory.groups.insert': 1,
+    'directory.members.insert': 1
+}
+DIRECTORY_QUOTA_PER_MINUTE = 2400
+
+# Discord: global bot limit, and name/topic edits are limited per channel
+DISCORD_GLOBAL_PER_SECOND = 50
+DISCORD_RENAME_PER_10_MIN = 2
+DISCORD_RENAME_FIELDS = ('name', 'topic')
+
+# Fallback latencies (seconds) when no sample has been measured yet
+DEFAULT_LATENCY = {
+    'directory.groups.insert': 0.8,
+    'directory.members.insert': 0.5,
+    'discord.PATCH /channels/{channel_id}': 0.3
+}
+
+# Keys each operation needs before it can be planned
+REQUIRED_KEYS = {
+    'create_group': ('group_email', 'group_name'),
+    'add_member': ('group_email', 'member_email'),
+    'modify_channel': ('channel_id',)
+}
+
+CHANNEL_FIELDS = ['name', 'topic', 'position', 'nsfw', 'rate_limit_per_user',
+                  'bitrate', 'user_limit', 'parent_id']
+# Same type conversion as modify-channel.py's CLI
+CHANNEL_INT_FIELDS = ('position', 'rate_limit_per_user', 'bitrate', 'user_limit')
+
+# Discord statuses meaning "this channel can't be edited by the bot"
+CHANNEL_UNREADABLE = {
+    403: 'channel not accessible (403)',
+    404: 'channel not found (404)'
+}
+DISCORD_MAX_RETRIES = 5
+
+
+def load_latencies():
+    """Median latency per endpoint from the latency log"""
+    samples = {}
+    if os.path.exists(LATENCY_LOG):
+        with open(LATENCY_LOG) as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                    endpoint, seconds = entry['endpoint'], float(entry['seconds'])
+                except (ValueError, KeyError, TypeError):
+                    continue
+                samples.setdefault(endpoint, []).append(seconds)
+
+    latencies = {}
+    for endpoint, default in DEFAULT_LATENCY.items():
+        values = samples.get(endpoint)
+        if values:
+            latencies[endpoint] = (statistics.median(values), len(values))
+        else:
+            latencies[endpoint] = (default, 0)
+    return latencies
+
+
+def job_hash(job_file):
+    """SHA-256 of the job file, stored with the snapshot it was built from"""
+    with open(job_file, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def load_job(job_file):
+    """Load a job file: {"guild_id": "...", "operations": [...]}"""
+    try:
+        with open(job_file) as f:
+            job = json.load(f)
+    except ValueError as e:
+        print(f"❌ Invalid job file: {e}")
+        sys.exit(1)
+    if not isinstance(job, dict) or not isinstance(job.get('operations', []), list):
+        print('❌ Invalid job file: expected {"operations": [...]}')
+        sys.exit(1)
+    return job.get('operations', []), job.get('guild_id')
+
+
+def normalize_channel_value(key, value):
+    """Convert a job value to the type Discord returns (raises ValueError)"""
+    if key in CHANNEL_INT_FIELDS:
+        return int(value)
+    if key == 'nsfw':
+        if isinstance(value, str):
+            return value.lower() in ['true', '1', 'yes']
+        return bool(value)
+    if key == 'parent_id':
+        return str(value)
+    return value
+
+
+def same_channel_value(key, current, value):
+    """Compare a cached channel field with a normalized job value"""
+    if key == 'topic':
+        return (current or None) == (value or None)
+    return current == value
+
+
+# ============================================================
+# SNAPSHOT (read-only)
+# ============================================================
+
+def snapshot_workspace(operations):
+    """Fetch groups and the members of every group the job touches
+
+    Exits on any API error so no partial state is ever cached.
+    """
+    from googleapiclient.errors import HttpError
+
+    try:
+        return fetch_workspace(operations)
+    except HttpError as error:
+        print(f"❌ Error fetching groups: {error}")
+        sys.exit(1)
+    except Exception as e:
+        print(f"❌ Unexpected error: {e}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
+
+
+def fetch_workspace(operations):
+    """Directory calls behind snapshot_workspace()"""
+    from google.oauth2 import service_account
+    from googleapiclient.discovery import build
+
+    credentials = service_account.Credentials.from_service_account_file(
+        SERVICE_ACCOUNT_FILE, scopes=SCOPES)
+    delegated_credentials = credentials.with_subject(ADMIN_EMAIL)
+    service = build('admin', 'directory_v1', credentials=delegated_credentials)
+
+    groups = {}
+    page_token = None
+    while True:
+        results = service.groups().list(customer='my_customer', pageToken=page_token).execute()
+        for group in results.get('groups', []):
+            groups[group['email'].lower()] = {'id': group['id'], 'members': None}
+        page_token = results.get('nextPageToken')
+        if not page_token:
+            break
+
+    touched = {op['group_email'].lower() for op in operations
+               if op.get('op') == 'add_member' and isinstance(op.get('group_email'), str)}
+    for group_email in sorted(touched & set(groups)):
+        members = {}
+        page_token = None
+        while True:
+            results = service.members().list(groupKey=group_email, pageToken=page_token).execute()
+            for member in results.get('members', []):
+                if member.get('email'):
+                    members[member['email'].lower()] = member.get('role', 'MEMBER')
+            page_token = results.get('nextPageToken')
+            if not page_token:
+                break
+        groups[group_email]['members'] = members
+        print(f"   📧 {group_email}: {len(members)} members")
+
+    return groups
+
+
+def discord_get(url, headers):
+    """GET a Discord endpoint, waiting out 429 rate limits (Retry-After)"""
+    import requests
+
+    for _ in range(DISCORD_MAX_RETRIES):
+        response = requests.get(url, headers=headers)
+        if response.status_code != 429:
+            return response
+        retry_after = float(response.headers.get('Retry-After', 1))
+        print(f"   ⏳ Rate limited, retrying in {retry_after}s")
+        time.sleep(retry_after)
+    return response
+
+
+def snapshot_discord(operations, guild_id):
+    """Fetch the channels the job touches (one call per guild if known)
+
+    Returns (channels, missing) where missing maps channel IDs the bot
+    can't read (403/404) to the HTTP status (404 when absent from the
+    guild). Any other error aborts the snapshot.
+    """
+    token = os.getenv('DISCORD_BOT_TOKEN')
+    if not token:
+        print("❌ DISCORD_BOT_TOKEN not found")
+        print("Run: source ~/.credentials/yoyaku/api-keys/discord.env")
+        sys.exit(1)
+    headers = {"Authorization": f"Bot {token}"}
+
+    wanted = {str(op['channel_id']) for op in operations
+              if op.get('op') == 'modify_channel' and op.get('channel_id')}
+    channels = {}
+    missing = {}
+
+    if guild_id:
+        response = discord_get(f"{DISCORD_API_URL}/guilds/{guild_id}/channels", headers)
+        if response.status_code != 200:
+            print(f"❌ Error: {response.status_code}")
+            print(f"   {response.text}")
+            sys.exit(1)
+        for channel in response.json():
+            if channel['id'] in wanted:
+                channels[channel['id']] = {k: channel.get(k) for k in CHANNEL_FIELDS}
+        for channel_id in wanted - set(channels):
+            missing[channel_id] = 404
+    else:
+        for channel_id in sorted(wanted):
+            response = discord_get(f"{DISCORD_API_URL}/channels/{channel_id}", headers)
+            if response.status_code == 200:
+                channel = response.json()
+                channels[channel_id] = {k: channel.get(k) for k in CHANNEL_FIELDS}
+            elif response.status_code in CHANNEL_UNREADABLE:
+                missing[channel_id] = response.status_code
+                print(f"   ⚠️  Channel {channel_id}: {response.status_code}")
+            else:
+                print(f"❌ Error reading channel {channel_id}: {response.status_code}")
+                print(f"   {response.text}")
+                sys.exit(1)
+
+    return channels, missing
+
+
+def snapshot(job_file):
+    """Cache the current state of everything the job touches"""
+    operations, guild_id = load_job(job_file)
+    operations = [op for op in operations if isinstance(op, dict)]
+    ops = {op.get('op') for op in operations}
+
+    state = {'fetched_at': datetime.now().isoformat(timespec='seconds'),
+             'job': os.path.abspath(job_file), 'job_hash': job_hash(job_file),
+             'sections': [], 'groups': {}, 'channels': {}, 'missing_channels': {}}
+
+    print(f"📸 Snapshot for {job_file}")
+    if ops & {'create_group', 'add_member'}:
+        state['groups'] = snapshot_workspace(operations)
+        state['sections'].append('groups')
+        print(f"   ✅ {len(state['groups'])} groups cached")
+    if 'modify_channel' in ops:
+        state['channels'], state['missing_channels'] = snapshot_discord(operations, guild_id)
+        state['sections'].append('channels')
+        print(f"   ✅ {len(state['channels'])} channels cached")
+
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    with open(STATE_CACHE, 'w') as f:
+        json.dump(state, f, indent=2)
+    print(f"   💾 {STATE_CACHE}")
+    print()
+    return state
+
+
+# ============================================================
+# PLAN (offline)
+# ============================================================
+
+def resolve(operations, state):
+    """Resolve operations against cached state
+
+    Returns (writes, skipped, errors). Each write is a dict with
+    'endpoint', 'target' and 'unresolved' (True when the cache had no
+    data to compare against, so the write is assumed necessary).
+    Sections missing from state['sections'] were not fetched: their
+    targets are unresolved, never reported as missing.
+    """
+    sections = state.get('sections', [])
+    groups_fetched = 'groups' in sections
+    channels_fetched = 'channels' in sections
+    groups = state.get('groups', {})
+    channels = state.get('channels', {})
+    missing_channels = state.get('missing_channels', {})
+    writes, skipped, errors = [], [], []
+    created = set()
+    added = set()
+    channel_changes = {}
+
+    for op in operations:
+        if not isinstance(op, dict):
+            errors.append((json.dumps(op), 'operation is not an object'))
+            continue
+        kind = op.get('op')
+
+        if kind not in REQUIRED_KEYS:
+            errors.append((json.dumps(op), f"unknown op: {kind}"))
+            continue
+        missing = [key for key in REQUIRED_KEYS[kind] if not op.get(key)
+                   or (key != 'channel_id' and not isinstance(op[key], str))]
+        if missing:
+            errors.append((json.dumps(op), f"missing {', '.join(missing)}"))
+            continue
+
+        if kind == 'create_group':
+            email = op['group_email'].lower()
+            if email in groups or email in created:
+                skipped.append((f"create_group {email}", 'group already exists'))
+                continue
+            created.add(email)
+            writes.append({'endpoint': 'directory.groups.insert', 'target': email,
+                           'unresolved': not groups_fetched})
+
+        elif kind == 'add_member':
+            group = op['group_email'].lower()
+            member = op['member_email'].lower()
+            role = op.get('role', 'MEMBER')
+            label = f"add_member {member} -> {group}"
+            if (group, member) in added:
+                skipped.append((label, 'duplicate in job'))
+                continue
+            if groups_fetched and group not in groups and group not in created:
+                errors.append((label, 'group not found (404)'))
+                continue
+            if group in groups:
+                current = groups[group].get('members')
+            else:
+                current = {} if groups_fetched and group in created else None
+            if current is not None and member in current:
+                reason = 'already a member'
+                if current[member] != role:
+                    reason += f" as {current[member]} (add_member does not change roles)"
+                skipped.append((label, reason))
+                continue
+            added.add((group, member))
+            writes.append({'endpoint': 'directory.members.insert', 'target': f"{member} -> {group}",
+                           'unresolved': current is None})
+
+        elif kind == 'modify_channel':
+            channel_id = str(op['channel_id'])
+            changes = {}
+            for key, value in op.items():
+                if key in ('op', 'channel_id') or value is None:
+                    continue
+                if key not in CHANNEL_FIELDS:
+                    errors.append((f"modify_channel {channel_id}", f"unknown field: {key}"))
+                    continue
+                try:
+                    changes[key] = normalize_channel_value(key, value)
+                except (ValueError, TypeError):
+                    errors.append((f"modify_channel {channel_id}", f"invalid {key}: {value!r}"))
+            channel_changes.setdefault(channel_id, {}).update(changes)
+
+    # Several edits on one channel are merged into a single PATCH
+    for channel_id, changes in channel_changes.items():
+        if channel_id in missing_channels:
+            status = missing_channels[channel_id]
+            errors.append((f"modify_channel {channel_id}",
+                           CHANNEL_UNREADABLE.get(status, f"channel unreadable ({status})")))
+            continue
+        current = channels.get(channel_id) if channels_fetched else None
+        if current is not None:
+            changes = {k: v for k, v in changes.items()
+                       if not same_channel_value(k, current.get(k), v)}
+        if not changes:
+            skipped.append((f"modify_channel {channel_id}", 'no change'))
+            continue
+        writes.append({'endpoint': 'discord.PATCH /channels/{channel_id}', 'target': channel_id,
+                       'changes': changes, 'unresolved': current is None})
+
+    return writes, skipped, errors
+
+
+def estimate(writes, latencies):
+    """Estimate request count, quota, rate-limit buckets and duration"""
+    counts = {}
+    for write in writes:
+        counts[write['endpoint']] = counts.get(write['endpoint'], 0) + 1
+
+    # Google Workspace - bounded by latency or by the per-minute quota
+    directory_units = sum(DIRECTORY_QUOTA_COST[e] * n for e, n in counts.items() if e in DIRECTORY_QUOTA_COST)
+    directory_latency = sum(latencies[e][0] * n for e, n in counts.items() if e.startswith('directory.'))
+    directory_quota_seconds = 0
+    if directory_units > DIRECTORY_QUOTA_PER_MINUTE:
+        directory_quota_seconds = directory_units / DIRECTORY_QUOTA_PER_MINUTE * 60
+    directory_seconds = max(directory_latency, directory_quota_seconds)
+
+    # Discord - one PATCH per channel bucket, renames use the 2/10min bucket
+    discord_writes = [w for w in writes if w['endpoint'].startswith('discord.')]
+    renames = sum(1 for w in discord_writes if set(w['changes']) & set(DISCORD_RENAME_FIELDS))
+    discord_latency = sum(latencies[e][0] * n for e, n in counts.items() if e.startswith('discord.'))
+    discord_seconds = max(discord_latency, len(discord_writes) / DISCORD_GLOBAL_PER_SECOND)
+
+    return {
+        'requests': len(writes),
+        'requests_by_endpoint': counts,
+        'directory_quota_units': directory_units,
+        'directory_quota_per_minute': DIRECTORY_QUOTA_PER_MINUTE,
+        'discord_channel_buckets': len(discord_writes),
+        'discord_rename_bucket_usage': renames,
+        'directory_seconds': round(directory_seconds, 1),
+        'discord_seconds': round(discord_seconds, 1),
+        'total_seconds': round(directory_seconds + discord_seconds, 1)
+    }
+
+
+def format_duration(seconds):
+    minutes, seconds = divmod(int(math.ceil(seconds)), 60)
+    hours, minutes = divmod(minutes, 60)
+    if hours:
+        return f"{hours}h{minutes:02d}m"
+    if minutes:
+        return f"{minutes}m{seconds:02d}s"
+    return f"{seconds}s"
+
+
+def plan(job_file, as_json=False):
+    """Print the dry-run plan for a job file"""
+    operations, _ = load_job(job_file)
+
+    if not os.path.exists(STATE_CACHE):
+        print(f"❌ No cached state: {STATE_CACHE}")
+        print(f"Run: plan-job.py snapshot {job_file}")
+        sys.exit(1)
+    with open(STATE_CACHE) as f:
+        state = json.load(f)
+    if state.get('job_hash') != job_hash(job_file):
+        print(f"❌ Cached state was built from another job: {state.get('job', 'unknown')}")
+        print(f"Run: plan-job.py snapshot {job_file}")
+        sys.exit(1)
+
+    latencies = load_latencies()
+    writes, skipped, errors = resolve(operations, state)
+    summary = estimate(writes, latencies)
+
+    if as_json:
+        print(json.dumps({'state_fetched_at': state.get('fetched_at'), 'writes': writes,
+                          'skipped': skipped, 'errors': errors, 'estimate': summary}, indent=2))
+        if errors:
+            sys.exit(1)
+        return summary
+
+    print("=" * 60)
+    print(f"🧮 DRY-RUN PLAN - {job_file}")
+    print(f"   State cached: {state.get('fetched_at', 'unknown')}")
+    print("=" * 60)
+    print()
+    print(f"Operations: {len(operations)} → Writes needed: {len(writes)}")
+    print()
+
+    for write in writes:
+        flag = "  (not in cache)" if write['unresolved'] else ""
+        print(f"✏️  {write['endpoint']}  {write['target']}{flag}")
+        for key, value in write.get('changes', {}).items():
+            print(f"      {key}: {value}")
+    for label, reason in skipped:
+        print(f"⏭️  {label} - {reason}")
+    for label, reason in errors:
+        print(f"❌ {label} - {reason}")
+    print()
+
+    print("📊 ESTIMATE")
+    print("-" * 60)
+    for endpoint, count in summary['requests_by_endpoint'].items():
+        latency, samples = latencies[endpoint]
+        source = f"median of {samples}" if samples else "default"
+        print(f"   {endpoint}: {count} × {latency:.2f}s ({source})")
+    print(f"   Directory quota: {summary['directory_quota_units']} units "
+          f"(limit {DIRECTORY_QUOTA_PER_MINUTE}/min)")
+    print(f"   Discord channel buckets: {summary['discord_channel_buckets']} "
+          f"(1 PATCH each, global {DISCORD_GLOBAL_PER_SECOND}/s)")
+    if summary['discord_rename_bucket_usage']:
+        print(f"   Discord name/topic edits: {summary['discord_rename_bucket_usage']} channels "
+              f"(limit {DISCORD_RENAME_PER_10_MIN} per channel / 10 min)")
+    print(f"   ⏱️  Estimated time: {format_duration(summary['total_seconds'])} "
+          f"(Workspace {format_duration(summary['directory_seconds'])}, "
+          f"Discord {format_duration(summary['discord_seconds'])})")
+    print()
+    if errors:
+        print(f"❌ {len(errors)} operation(s) can't run - fix the job before launching it")
+        sys.exit(1)
+    return summary
+
+
+if __name__ == '__main__':
+    if len(sys.argv) < 3 or sys.argv[1] not in ('snapshot', 'plan'):
+        print("Usage:")
+        print()
+        print("  # Cache current state of groups/channels touched by the job (read-only)")
+        print("  plan-job.py snapshot JOB.json")
+        print()
+        print("  # Show writes needed + request/quota/time estimate (offline)")
+        print("  plan-job.py plan JOB.json [--json]")
+        print()
+        sys.exit(1)
+
+    command, job_file = sys.argv[1], sys.argv[2]
+
+    if command == 'snapshot':
+        snapshot(job_file)
+    else:
+        plan(job_file, as_json='--json' in sys.argv[3:])
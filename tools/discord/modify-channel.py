@@ -6,6 +6,8 @@ Benjamin Belaga - YOYAKU - 2025-11-20
 
 import os
 import sys
+import json
+import time
 import requests
 
 # Load Discord credentials
@@ -17,6 +19,18 @@ if not DISCORD_BOT_TOKEN:
 
 DISCORD_API_URL = "https://discord.com/api/v10"
 
+# Per-endpoint latency samples (used by the bulk planner)
+LATENCY_LOG = os.path.expanduser('~/.cache/yoyaku/api-latency.jsonl')
+
+def record_latency(endpoint, seconds):
+    """Append a latency sample, read by ~/tools/bulk-plan/plan-job.py"""
+    try:
+        os.makedirs(os.path.dirname(LATENCY_LOG), exist_ok=True)
+        with open(LATENCY_LOG, 'a') as f:
+            f.write(json.dumps({'endpoint': endpoint, 'seconds': round(seconds, 3)}) + '\n')
+    except OSError:
+        pass
+
 def modify_channel(channel_id, **kwargs):
     """
     Modify a Discord channel
@@ -54,9 +68,11 @@ def modify_channel(channel_id, **kwargs):
         print(f"   {key}: {value}")
     print()
 
+    started = time.monotonic()
     response = requests.patch(url, headers=headers, json=data)
 
     if response.status_code == 200:
+        record_latency('discord.PATCH /channels/{channel_id}', time.monotonic() - started)
         result = response.json()
         print(f"✅ Channel modified successfully!")
         print(f"   Name: {result.get('name')}")
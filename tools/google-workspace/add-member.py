@@ -6,6 +6,8 @@ Benjamin Belaga - YOYAKU - 2025-11-20
 
 import os
 import sys
+import json
+import time
 from google.oauth2 import service_account
 from googleapiclient.discovery import build
 from googleapiclient.errors import HttpError
@@ -18,6 +20,18 @@ SCOPES = [
     'https://www.googleapis.com/auth/admin.directory.group.member'
 ]
 
+# Per-endpoint latency samples (used by the bulk planner)
+LATENCY_LOG = os.path.expanduser('~/.cache/yoyaku/api-latency.jsonl')
+
+def record_latency(endpoint, seconds):
+    """Append a latency sample, read by ~/tools/bulk-plan/plan-job.py"""
+    try:
+        os.makedirs(os.path.dirname(LATENCY_LOG), exist_ok=True)
+        with open(LATENCY_LOG, 'a') as f:
+            f.write(json.dumps({'endpoint': endpoint, 'seconds': round(seconds, 3)}) + '\n')
+    except OSError:
+        pass
+
 def add_member(group_email, member_email, role='MEMBER'):
     """Add a member to a Google Workspace group
 
@@ -44,10 +58,12 @@ def add_member(group_email, member_email, role='MEMBER'):
 
         print(f"➕ Adding {member_email} to {group_email}...")
 
+        started = time.monotonic()
         result = service.members().insert(
             groupKey=group_email,
             body=member_data
         ).execute()
+        record_latency('directory.members.insert', time.monotonic() - started)
 
         print(f"   ✅ Added successfully (role: {role})")
 
@@ -6,6 +6,8 @@ Benjamin Belaga - YOYAKU - 2025-11-20
 
 import os
 import sys
+import json
+import time
 from google.oauth2 import service_account
 from googleapiclient.discovery import build
 from googleapiclient.errors import HttpError
@@ -17,6 +19,18 @@ SCOPES = [
     'https://www.googleapis.com/auth/admin.directory.group'
 ]
 
+# Per-endpoint latency samples (used by the bulk planner)
+LATENCY_LOG = os.path.expanduser('~/.cache/yoyaku/api-latency.jsonl')
+
+def record_latency(endpoint, seconds):
+    """Append a latency sample, read by ~/tools/bulk-plan/plan-job.py"""
+    try:
+        os.makedirs(os.path.dirname(LATENCY_LOG), exist_ok=True)
+        with open(LATENCY_LOG, 'a') as f:
+            f.write(json.dumps({'endpoint': endpoint, 'seconds': round(seconds, 3)}) + '\n')
+    except OSError:
+        pass
+
 def create_group(group_email, group_name, description=''):
     """Create a Google Workspace group"""
 
@@ -42,7 +56,9 @@ def create_group(group_email, group_name, description=''):
             print(f"   Description: {description}")
         print()
 
+        started = time.monotonic()
         result = service.groups().insert(body=group_data).execute()
+        record_latency('directory.groups.insert', time.monotonic() - started)
 
         print(f"✅ Group created successfully!")
         print(f"   Email: {result['email']}")